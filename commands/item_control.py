@@ -1,8 +1,30 @@
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from supabase_client import supabase
+from tracing import capture_profile, install as install_tracing, span, traced
 from discord.errors import Forbidden, NotFound
+from postgrest.exceptions import APIError
+
+PAGE_SIZE = 1000      # linhas por página nas leituras paginadas do Supabase
+IMPORT_BATCH = 500    # linhas por upsert durante a importação
+
+LIST_FIELDS = ("channel_id", "list_name", "id_counter")
+ITEM_FIELDS = ("channel_id", "list_name", "item_id", "name", "qty")
+EXPORT_FIELDS = ("tipo", "channel_id", "list_name", "id_counter", "item_id", "name", "qty")
+INT_FIELDS = ("channel_id", "id_counter", "item_id", "qty")
+
+EVENT_BATCH = 100           # eventos de histórico por insert
+EVENT_FLUSH_SECONDS = 10    # intervalo entre gravações dos eventos pendentes
+EVENT_MAX_BACKOFF = 600     # espera máxima entre tentativas após falhas seguidas
+EVENT_MAX_PENDING = 5000    # limite do buffer se o Supabase estiver indisponível
 
 
 class ItemControl(commands.Cog):
@@ -12,7 +34,17 @@ class ItemControl(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._initialized = False
+        self._pending_events = []
+        self._gravando_eventos = False
+        self._falhas_eventos = 0
+        self._eventos_backoff_ate = 0.0
+        install_tracing()
         bot.loop.create_task(self._auto_initialize())
+        self._event_flusher.start()
+
+    async def cog_unload(self):
+        self._event_flusher.cancel()
+        await self._grava_eventos(forcar=True)
 
 
     async def _safe_get_channel(self, cid: int):
@@ -132,20 +164,311 @@ class ItemControl(commands.Cog):
             )
 
     async def _log(self, guild_id: int, content: str = None, embed: discord.Embed = None):
-        log_chan_id = self._get_settings(guild_id).get("log_channel_id")
-        if not log_chan_id:
+        with span("_log"):
+            log_chan_id = self._get_settings(guild_id).get("log_channel_id")
+            if not log_chan_id:
+                return
+            try:
+                channel = self.bot.get_channel(log_chan_id) or await self.bot.fetch_channel(log_chan_id)
+                await channel.send(content=content, embed=embed)
+            except discord.Forbidden:
+                return
+            except Exception as e:
+                print(f"Erro ao enviar log no canal {log_chan_id}: {e}")
+
+    def _novo_evento(self, guild_id: int, channel_id: int, lista: str, item_id: int, item: str,
+                     delta: int, user_id: int) -> dict:
+        return {
+            "guild_id": guild_id,
+            "channel_id": channel_id,
+            "list_name": lista,
+            "item_id": item_id,
+            "name": item,
+            "delta": delta,
+            "user_id": user_id,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _registra_evento(self, guild_id: int, channel_id: int, lista: str, item_id: int, item: str,
+                         delta: int, user_id: int):
+        """Enfileira uma alteração de quantidade; o _event_flusher grava o histórico (item_events)."""
+        self._pending_events.append(
+            self._novo_evento(guild_id, channel_id, lista, item_id, item, delta, user_id)
+        )
+
+    def _insere_eventos(self, batch: list) -> tuple[list, Exception]:
+        """Insere em lotes de EVENT_BATCH; devolve o que não foi gravado e o erro, se houver."""
+        for i in range(0, len(batch), EVENT_BATCH):
+            try:
+                supabase.table("item_events").insert(batch[i:i + EVENT_BATCH]).execute()
+            except Exception as e:
+                return batch[i:], e
+        return [], None
+
+    async def _grava_eventos(self, forcar: bool = False):
+        if not self._pending_events or self._gravando_eventos:
+            return
+        if not forcar and time.monotonic() < self._eventos_backoff_ate:
             return
+        batch, self._pending_events = self._pending_events, []
+        self._gravando_eventos = True
         try:
-            channel = self.bot.get_channel(log_chan_id) or await self.bot.fetch_channel(log_chan_id)
-            await channel.send(content=content, embed=embed)
-        except discord.Forbidden:
+            restantes, erro = await asyncio.to_thread(self._insere_eventos, batch)
+        finally:
+            self._gravando_eventos = False
+        if erro is None:
+            self._falhas_eventos = 0
+            self._eventos_backoff_ate = 0.0
             return
-        except Exception as e:
-            print(f"Erro ao enviar log no canal {log_chan_id}: {e}")
+        print(f"Erro ao gravar {len(restantes)} eventos de histórico: {erro}")
+        self._pending_events = (restantes + self._pending_events)[-EVENT_MAX_PENDING:]
+        self._falhas_eventos += 1
+        espera = min(EVENT_FLUSH_SECONDS * 2 ** self._falhas_eventos, EVENT_MAX_BACKOFF)
+        self._eventos_backoff_ate = time.monotonic() + espera
+
+    def _resume_historico(self, chave: dict, desde: str):
+        """Soma entradas e saídas por item a partir de `desde`, paginando os eventos."""
+        resumo = {}
+        usuarios = set()
+        n_eventos = 0
+        for e in self._paginate("item_events", ("name", "delta", "user_id"), chave, ("created_at", "id"), desde):
+            entradas, saidas = resumo.get(e["name"], (0, 0))
+            if e["delta"] > 0:
+                entradas += e["delta"]
+            else:
+                saidas -= e["delta"]
+            resumo[e["name"]] = (entradas, saidas)
+            usuarios.add(e["user_id"])
+            n_eventos += 1
+        return resumo, n_eventos, usuarios
+
+    @tasks.loop(seconds=EVENT_FLUSH_SECONDS)
+    async def _event_flusher(self):
+        await self._grava_eventos()
+
+    def _paginate(self, table: str, fields: tuple[str, ...], filtros: dict, order: tuple[str, ...],
+                  desde: str = None):
+        """Percorre as linhas filtradas em páginas de PAGE_SIZE, sem carregar tudo."""
+        start = 0
+        while True:
+            query = supabase.table(table).select(",".join(fields)).match(filtros)
+            if desde:
+                query = query.gte("created_at", desde)
+            for col in order:
+                query = query.order(col)
+            rows = query.range(start, start + PAGE_SIZE - 1).execute().data or []
+            yield from rows
+            if len(rows) < PAGE_SIZE:
+                return
+            start += PAGE_SIZE
+
+    def _paginate_lists(self, guild_id: int):
+        return self._paginate("lists", LIST_FIELDS, {"guild_id": guild_id}, ("channel_id", "list_name"))
+
+    def _paginate_items(self, guild_id: int):
+        return self._paginate("items", ITEM_FIELDS, {"guild_id": guild_id}, ("channel_id", "list_name", "item_id"))
+
+    def _exporta(self, guild_id: int, formato: str):
+        """Grava a exportação num arquivo temporário e o devolve posicionado no início."""
+        fp = tempfile.TemporaryFile()
+        text = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+        if formato == "json":
+            self._exporta_json(guild_id, text)
+        else:
+            self._exporta_csv(guild_id, text)
+        text.flush()
+        text.detach()
+        fp.seek(0)
+        return fp
+
+    def _exporta_csv(self, guild_id: int, fp):
+        writer = csv.DictWriter(fp, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for row in self._paginate_lists(guild_id):
+            writer.writerow({"tipo": "lista", **row})
+        for row in self._paginate_items(guild_id):
+            writer.writerow({"tipo": "item", **row})
+
+    def _exporta_json(self, guild_id: int, fp):
+        fp.write(f'{{"guild_id": {guild_id}, "lists": [')
+        for n, row in enumerate(self._paginate_lists(guild_id)):
+            fp.write(("," if n else "") + json.dumps(row, ensure_ascii=False))
+        fp.write('], "items": [')
+        for n, row in enumerate(self._paginate_items(guild_id)):
+            fp.write(("," if n else "") + json.dumps(row, ensure_ascii=False))
+        fp.write("]}")
+
+    def _le_importacao(self, data: bytes, formato: str):
+        """Gera pares (tipo, linha) a partir do arquivo exportado."""
+        text = data.decode("utf-8-sig")
+        if formato == "csv":
+            for row in csv.DictReader(io.StringIO(text)):
+                tipo = row.pop("tipo")
+                fields = LIST_FIELDS if tipo == "lista" else ITEM_FIELDS
+                yield tipo, {k: row[k] for k in fields}
+        else:
+            payload = json.loads(text)
+            for row in payload.get("lists", []):
+                yield "lista", {k: row[k] for k in LIST_FIELDS}
+            for row in payload.get("items", []):
+                yield "item", {k: row[k] for k in ITEM_FIELDS}
+
+    def _importa(self, guild_id: int, linhas, canais: set[int], totais: dict, user_id: int, eventos: list):
+        """Mescla as linhas no servidor em upserts de IMPORT_BATCH; listas sempre antes dos itens.
+
+        Itens são casados pelo nome dentro da lista: um nome já existente mantém seu
+        item_id e recebe a quantidade do arquivo; nomes novos ganham ids a partir do
+        id_counter da lista. Linhas de canais fora de `canais` são ignoradas. `totais`
+        é atualizado a cada lote gravado, para que o chamador saiba o que já foi salvo
+        se algo falhar; a diferença de qty de cada lote gravado vai para `eventos`.
+        """
+        pendentes = {"lists": [], "items": {}, "eventos": []}
+        contadores = {
+            (r["channel_id"], r["list_name"]): r.get("id_counter") or 0
+            for r in self._paginate_lists(guild_id)
+        }
+        contadores_gravados = dict(contadores)
+        existentes = {}
+
+        def itens_da_lista(key) -> dict:
+            if key not in existentes:
+                channel_id, nome = key
+                existentes[key] = {
+                    i["name"]: [i["item_id"], i["qty"]]
+                    for i in self._paginate("items", ("item_id", "name", "qty"), {
+                        "guild_id": guild_id,
+                        "channel_id": channel_id,
+                        "list_name": nome
+                    }, ("item_id",))
+                }
+            return existentes[key]
+
+        def flush_lists():
+            if pendentes["lists"]:
+                supabase.table("lists").upsert(pendentes["lists"]).execute()
+                totais["lists"] += len(pendentes["lists"])
+                totais["lotes"] += 1
+                pendentes["lists"] = []
+
+        def flush_items():
+            if not pendentes["items"]:
+                return
+            flush_lists()
+            # o contador é gravado antes dos itens para nunca ficar atrás dos ids usados
+            for (channel_id, nome), contador in contadores.items():
+                if contador != contadores_gravados.get((channel_id, nome)):
+                    supabase.table("lists")\
+                            .update({"id_counter": contador})\
+                            .match({
+                                "guild_id": guild_id,
+                                "channel_id": channel_id,
+                                "list_name": nome
+                            })\
+                            .execute()
+                    contadores_gravados[(channel_id, nome)] = contador
+            batch = list(pendentes["items"].values())
+            supabase.table("items").upsert(batch).execute()
+            totais["items"] += len(batch)
+            totais["lotes"] += 1
+            pendentes["items"] = {}
+            eventos.extend(pendentes["eventos"])
+            pendentes["eventos"] = []
+
+        for tipo, row in linhas:
+            if tipo not in ("lista", "item"):
+                raise ValueError(f"tipo de linha desconhecido: {tipo}")
+            record = {
+                k: (int(v) if v not in ("", None) else None) if k in INT_FIELDS else v
+                for k, v in row.items()
+            }
+            if record["channel_id"] not in canais:
+                totais["ignoradas"] += 1
+                continue
+            record["guild_id"] = guild_id
+            key = (record["channel_id"], record["list_name"])
+            if tipo == "lista":
+                # ids do arquivo não são reaproveitados; o contador segue o do servidor
+                record["id_counter"] = contadores.setdefault(key, 0)
+                contadores_gravados.setdefault(key, 0)
+                pendentes["lists"].append(record)
+                if len(pendentes["lists"]) >= IMPORT_BATCH:
+                    flush_lists()
+                continue
+
+            nomes = itens_da_lista(key)
+            if record["name"] not in nomes:
+                contadores[key] = contadores.get(key, 0) + 1
+                nomes[record["name"]] = [contadores[key], 0]
+            record["item_id"], qty_anterior = nomes[record["name"]]
+            delta = (record["qty"] or 0) - qty_anterior
+            nomes[record["name"]][1] = record["qty"] or 0
+            if delta:
+                pendentes["eventos"].append(self._novo_evento(
+                    guild_id, record["channel_id"], record["list_name"],
+                    record["item_id"], record["name"], delta, user_id
+                ))
+            pendentes["items"][(key, record["item_id"])] = record
+            if len(pendentes["items"]) >= IMPORT_BATCH:
+                flush_items()
+
+        flush_lists()
+        flush_items()
+
+    async def _publica_listas(self, guild_id: int) -> int:
+        """(Re)publica o embed de cada lista do servidor e retorna quantas foram publicadas."""
+        total = 0
+        listas = await asyncio.to_thread(lambda: list(self._paginate(
+            "lists", ("channel_id", "list_name", "message_id"), {"guild_id": guild_id},
+            ("channel_id", "list_name")
+        )))
+        for row in listas:
+            channel_id, nome, msg_id = row["channel_id"], row["list_name"], row.get("message_id") or 0
+            chave = {"guild_id": guild_id, "channel_id": channel_id, "list_name": nome}
+
+            itens = await asyncio.to_thread(lambda: list(self._paginate(
+                "items", ("item_id", "name", "qty"), chave, ("item_id",)
+            )))
+
+            desc = "\n".join(f"`[{i['item_id']}]` {i['name']} — {i['qty']}" for i in itens) or "Sem itens."
+            embed = discord.Embed(title=f"Lista: {nome}", description=desc, color=discord.Color.blurple())
+            embed.set_footer(text="Use /adicionar_item, /remover_item ou /remover_lista aqui.")
+
+            channel = await self._safe_get_channel(channel_id)
+
+            if channel is None:
+                await asyncio.to_thread(lambda: (
+                    supabase.table("lists").delete().match({
+                        "guild_id": guild_id,
+                        "channel_id": channel_id
+                    }).execute(),
+                    supabase.table("list_channels").delete().match({
+                        "guild_id": guild_id,
+                        "channel_id": channel_id
+                    }).execute()
+                ))
+                continue
+
+            if msg_id:
+                try:
+                    msg = await self._safe_get_message(channel, msg_id)
+                    if msg:
+                        await msg.edit(embed=embed)
+                        total += 1
+                        continue
+                except Exception:
+                    pass
+
+            msg = await channel.send(embed=embed)
+            await asyncio.to_thread(
+                supabase.table("lists").update({"message_id": msg.id}).match(chave).execute
+            )
+            total += 1
+        return total
 
     config = app_commands.Group(name="config", description="Comandos de configuração do bot")
 
     @config.command(name="show", description="Mostra as configurações atuais do bot")
+    @traced
     async def config_show(self, interaction: discord.Interaction):
         self._check_permission(interaction)
         cfg = self._get_settings(interaction.guild.id)
@@ -170,6 +493,7 @@ class ItemControl(commands.Cog):
 
     @config.command(name="adicionar_canal_lista", description="Autoriza um canal para usar listas")
     @app_commands.describe(canal="Canal a autorizar")
+    @traced
     async def config_add_list_channel(self, interaction: discord.Interaction, canal: discord.TextChannel):
         self._check_permission(interaction)
         supabase.table("list_channels")\
@@ -183,6 +507,7 @@ class ItemControl(commands.Cog):
 
     @config.command(name="remover_canal_lista", description="Revoga permissão de canal para listas")
     @app_commands.describe(canal="Canal a revogar")
+    @traced
     async def config_remove_list_channel(self, interaction: discord.Interaction, canal: discord.TextChannel):
         self._check_permission(interaction)
         supabase.table("list_channels")\
@@ -197,6 +522,7 @@ class ItemControl(commands.Cog):
 
     @config.command(name="definir_canal_logs", description="Define o canal para logs do bot")
     @app_commands.describe(canal="Canal de logs")
+    @traced
     async def config_definir_logs(self, interaction: discord.Interaction, canal: discord.TextChannel):
         self._check_permission(interaction)
         supabase.table("settings")\
@@ -210,6 +536,7 @@ class ItemControl(commands.Cog):
 
     @config.command(name="adicionar_cargo", description="Adiciona cargo permitido para usar comandos")
     @app_commands.describe(cargo="Cargo a permitir")
+    @traced
     async def config_add_role(self, interaction: discord.Interaction, cargo: discord.Role):
         self._check_permission(interaction)
         supabase.table("allowed_roles")\
@@ -223,6 +550,7 @@ class ItemControl(commands.Cog):
 
     @config.command(name="remover_cargo", description="Remove cargo permitido")
     @app_commands.describe(cargo="Cargo a remover")
+    @traced
     async def config_remove_role(self, interaction: discord.Interaction, cargo: discord.Role):
         self._check_permission(interaction)
         supabase.table("allowed_roles")\
@@ -237,6 +565,7 @@ class ItemControl(commands.Cog):
 
     @app_commands.command(name="criar_lista", description="Cria nova lista (ou mostra a existente)")
     @app_commands.describe(nome="Nome da lista")
+    @traced
     async def criar_lista(self, interaction: discord.Interaction, nome: str):
         self._check_permission(interaction)
         self._ensure_list_channel(interaction)
@@ -294,6 +623,7 @@ class ItemControl(commands.Cog):
 
     @app_commands.command(name="adicionar_item", description="Adiciona item na lista")
     @app_commands.describe(lista="Nome da lista", item="Nome do item", quantidade="Quantidade")
+    @traced
     async def adicionar_item(self, interaction: discord.Interaction, lista: str, item: str, quantidade: int = 1):
         self._check_permission(interaction)
         self._ensure_list_channel(interaction)
@@ -371,6 +701,8 @@ class ItemControl(commands.Cog):
                     .execute()
             item_id = next_id
 
+        self._registra_evento(guild_id, channel_id, lista, item_id, item, quantidade, interaction.user.id)
+
         itens = supabase.table("items")\
                         .select("item_id,name,qty")\
                         .match({
@@ -403,6 +735,7 @@ class ItemControl(commands.Cog):
         )
 
     @adicionar_item.autocomplete('lista')
+    @traced
     async def lista_autocomplete_adicionar(self, interaction: discord.Interaction, current: str):
         rows = supabase.table("lists")\
                        .select("list_name")\
@@ -417,6 +750,7 @@ class ItemControl(commands.Cog):
         ][:25]  
 
     @adicionar_item.autocomplete('item')
+    @traced
     async def item_autocomplete_adicionar(self, interaction: discord.Interaction, current: str):
         lista = interaction.namespace.lista
         rows = supabase.table("items")\
@@ -435,6 +769,7 @@ class ItemControl(commands.Cog):
 
     @app_commands.command(name="remover_item", description="Remove item da lista")
     @app_commands.describe(lista="Nome da lista", item="Nome do item", quantidade="Quantidade")
+    @traced
     async def remover_item(self, interaction: discord.Interaction, lista: str, item: str, quantidade: int = 1):
         self._check_permission(interaction)
         self._ensure_list_channel(interaction)
@@ -480,6 +815,10 @@ class ItemControl(commands.Cog):
                     })\
                     .execute()
 
+        self._registra_evento(
+            guild_id, channel_id, lista, item_id, item, -min(quantidade, original), interaction.user.id
+        )
+
         itens = supabase.table("items")\
                         .select("item_id,name,qty")\
                         .match({
@@ -521,6 +860,7 @@ class ItemControl(commands.Cog):
         )
 
     @remover_item.autocomplete('lista')
+    @traced
     async def lista_autocomplete_remover(self, interaction: discord.Interaction, current: str):
         rows = supabase.table("lists")\
                        .select("list_name")\
@@ -535,6 +875,7 @@ class ItemControl(commands.Cog):
         ][:25]
 
     @remover_item.autocomplete('item')
+    @traced
     async def item_autocomplete_remover(self, interaction: discord.Interaction, current: str):
         lista = interaction.namespace.lista
         rows = supabase.table("items")\
@@ -551,8 +892,61 @@ class ItemControl(commands.Cog):
             for n in nomes if current.lower() in n.lower()
         ][:25]
 
+    @app_commands.command(name="historico", description="Mostra o que mudou numa lista nos últimos dias")
+    @app_commands.describe(lista="Nome da lista", dias="Quantos dias para trás")
+    @traced
+    async def historico(self, interaction: discord.Interaction, lista: str,
+                        dias: app_commands.Range[int, 1, 90] = 7):
+        self._check_permission(interaction)
+        self._ensure_list_channel(interaction)
+
+        guild_id = interaction.guild.id
+        channel_id = interaction.channel.id
+        chave = {"guild_id": guild_id, "channel_id": channel_id, "list_name": lista}
+        desde = datetime.now(timezone.utc) - timedelta(days=dias)
+
+        await interaction.response.defer(ephemeral=True)
+        await self._grava_eventos()
+        resumo, n_eventos, usuarios = await asyncio.to_thread(self._resume_historico, chave, desde.isoformat())
+        if not n_eventos:
+            return await interaction.followup.send(
+                f"📜 Nenhuma alteração na lista **{lista}** nos últimos {dias} dias.", ephemeral=True
+            )
+
+        ordem = sorted(resumo.items(), key=lambda kv: -(kv[1][0] + kv[1][1]))
+        desc = "\n".join(
+            f"{nome} — +{entradas} / -{saidas} (saldo {entradas - saidas:+d})"
+            for nome, (entradas, saidas) in ordem[:30]
+        )
+        if len(ordem) > 30:
+            desc += f"\n… e mais {len(ordem) - 30} itens."
+
+        embed = discord.Embed(
+            title=f"Histórico: {lista} (últimos {dias} dias)",
+            description=desc,
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"{n_eventos} alterações por {len(usuarios)} usuário(s).")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @historico.autocomplete('lista')
+    @traced
+    async def lista_autocomplete_historico(self, interaction: discord.Interaction, current: str):
+        rows = supabase.table("lists")\
+                       .select("list_name")\
+                       .match({
+                           "guild_id": interaction.guild.id,
+                           "channel_id": interaction.channel.id
+                       })\
+                       .execute().data or []
+        return [
+            app_commands.Choice(name=r["list_name"], value=r["list_name"])
+            for r in rows if current.lower() in r["list_name"].lower()
+        ][:25]
+
     @app_commands.command(name="remover_lista", description="Remove toda uma lista e seus itens")
     @app_commands.describe(nome="Nome da lista a remover")
+    @traced
     async def remover_lista(self, interaction: discord.Interaction, nome: str):
         self._check_permission(interaction)
         self._ensure_list_channel(interaction)
@@ -604,68 +998,122 @@ class ItemControl(commands.Cog):
 
     @app_commands.command(name="iniciar_listas", description="(Re)publica todos os embeds de lista")
     @app_commands.checks.has_permissions(administrator=True)
+    @traced
     async def iniciar_listas(self, interaction: discord.Interaction):
         self._check_permission(interaction)
         guild_id = interaction.guild.id
         await interaction.response.defer()
-        total = 0
-        for row in supabase.table("lists")\
-                           .select("channel_id,list_name,message_id")\
-                           .eq("guild_id", guild_id)\
-                           .execute().data or []:
-            channel_id, nome, msg_id = row["channel_id"], row["list_name"], row.get("message_id") or 0
+        total = await self._publica_listas(guild_id)
 
-            itens = supabase.table("items")\
-                            .select("item_id,name,qty")\
-                            .match({
-                                "guild_id": guild_id,
-                                "channel_id": channel_id,
-                                "list_name": nome
-                            })\
-                            .execute().data or []
+        await interaction.followup.send(f"✅ Inicializadas {total} listas deste servidor.")
+        await self._log(
+            guild_id,
+            content=f"✅ (Re)publicadas {total} listas por {interaction.user.mention}"
+        )
 
-            desc = "\n".join(f"`[{i['item_id']}]` {i['name']} — {i['qty']}" for i in itens) or "Sem itens."
-            embed = discord.Embed(title=f"Lista: {nome}", description=desc, color=discord.Color.blurple())
-            embed.set_footer(text="Use /adicionar_item, /remover_item ou /remover_lista aqui.")
+    @app_commands.command(name="exportar_listas", description="Exporta todas as listas e itens do servidor")
+    @app_commands.describe(formato="Formato do arquivo exportado")
+    @app_commands.choices(formato=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSON", value="json"),
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    @traced
+    async def exportar_listas(self, interaction: discord.Interaction, formato: str = "csv"):
+        self._check_permission(interaction)
+        guild_id = interaction.guild.id
+        await interaction.response.defer(ephemeral=True)
 
-            channel = await self._safe_get_channel(channel_id) 
+        fp = None
+        try:
+            fp = await asyncio.to_thread(self._exporta, guild_id, formato)
+            await interaction.followup.send(
+                "📤 Exportação das listas deste servidor.",
+                file=discord.File(fp, filename=f"listas_{guild_id}.{formato}"),
+                ephemeral=True
+            )
+        except (APIError, discord.HTTPException) as e:
+            return await interaction.followup.send(f"⚠️ Não foi possível exportar as listas: {e}", ephemeral=True)
+        finally:
+            if fp is not None:
+                fp.close()
+        await self._log(
+            guild_id,
+            content=f"📤 Listas exportadas ({formato.upper()}) por {interaction.user.mention}"
+        )
 
-            if channel is None:
-                supabase.table("lists").delete().match({
-                    "guild_id": guild_id,
-                    "channel_id": channel_id
-                }).execute()
-                supabase.table("list_channels").delete().match({
-                    "guild_id": guild_id,
-                    "channel_id": channel_id
-                }).execute()
-                continue
-           
-            if msg_id:
-                try:
-                    msg = await self._safe_get_message(channel, msg_id)
-                    if msg:
-                        await msg.edit(embed=embed)
-                        total += 1
-                        continue
-                except Exception:
-                    pass
+    @app_commands.command(name="importar_listas", description="Importa listas e itens de um arquivo exportado")
+    @app_commands.describe(arquivo="Arquivo .csv ou .json gerado por /exportar_listas")
+    @app_commands.checks.has_permissions(administrator=True)
+    @traced
+    async def importar_listas(self, interaction: discord.Interaction, arquivo: discord.Attachment):
+        self._check_permission(interaction)
+        formato = arquivo.filename.rsplit(".", 1)[-1].lower()
+        if formato not in ("csv", "json"):
+            raise app_commands.AppCommandError(
+                "❌ Envie um arquivo .csv ou .json gerado por /exportar_listas."
+            )
 
-            msg = await channel.send(embed=embed)
-            supabase.table("lists")\
-                    .update({"message_id": msg.id})\
-                    .match({
-                        "guild_id": guild_id,
-                        "channel_id": channel_id,
-                        "list_name": nome
-                    })\
-                    .execute()
-            total += 1
+        guild_id = interaction.guild.id
+        await interaction.response.defer()
+        data = await arquivo.read()
+        # só canais de listas autorizados e que pertencem a este servidor
+        canais = {
+            cid for cid in self._get_list_channels(guild_id)
+            if interaction.guild.get_channel(cid) is not None
+        }
+        totais = {"lists": 0, "items": 0, "lotes": 0, "ignoradas": 0}
+        eventos = []
+        try:
+            await asyncio.to_thread(
+                self._importa, guild_id, self._le_importacao(data, formato), canais, totais,
+                interaction.user.id, eventos
+            )
+        except (KeyError, ValueError, TypeError, AttributeError, APIError) as e:
+            return await interaction.followup.send(
+                f"⚠️ Importação interrompida: {e}\n"
+                f"{totais['lotes']} lote(s) já gravados ({totais['lists']} listas, {totais['items']} itens) "
+                "não foram desfeitos."
+            )
+        finally:
+            # lotes já gravados entram no histórico mesmo se a importação parar no meio
+            self._pending_events.extend(eventos)
 
-        await interaction.followup.send(f"✅ Inicializadas {total} listas deste servidor.")
+        total = await self._publica_listas(guild_id)
+
+        ignoradas = ""
+        if totais["ignoradas"]:
+            ignoradas = f"\n⚠️ {totais['ignoradas']} linha(s) ignoradas: canal não autorizado para listas neste servidor."
+        await interaction.followup.send(
+            f"📥 Importadas {totais['lists']} listas e {totais['items']} itens; {total} listas publicadas.{ignoradas}"
+        )
         await self._log(
             guild_id,
-            content=f"✅ (Re)publicadas {total} listas por {interaction.user.mention}"
+            content=f"📥 {totais['lists']} listas e {totais['items']} itens importados por {interaction.user.mention}"
+        )
+
+    @app_commands.command(name="perfil", description="Captura um perfil de CPU do bot (Admin)")
+    @app_commands.describe(segundos="Duração da captura em segundos", ferramenta="Profiler a usar")
+    @app_commands.choices(ferramenta=[
+        app_commands.Choice(name="cProfile", value="cprofile"),
+        app_commands.Choice(name="pyinstrument", value="pyinstrument"),
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def perfil(self, interaction: discord.Interaction,
+                     segundos: app_commands.Range[int, 1, 300] = 30, ferramenta: str = "cprofile"):
+        self._check_permission(interaction)
+        await interaction.response.defer(ephemeral=True)
+        try:
+            relatorio = await capture_profile(segundos, ferramenta)
+        except ImportError:
+            return await interaction.followup.send("⚠️ pyinstrument não está instalado.", ephemeral=True)
+        except RuntimeError as e:
+            return await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
+
+        await interaction.followup.send(
+            f"📊 Perfil de {segundos}s ({ferramenta}).",
+            file=discord.File(io.BytesIO(relatorio.encode()), filename=f"perfil_{ferramenta}.txt"),
+            ephemeral=True
         )
 
 async def setup(bot: commands.Bot):
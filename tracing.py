@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+TRACE_ENABLED = os.getenv("TRACE_COMMANDS", "").lower() in ("1", "true", "sim")
+try:
+    SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+except ValueError:
+    SLOW_MS = 1000.0
+
+_current = contextvars.ContextVar("trace", default=None)
+_installed = False
+_profiling = False
+
+
+class Trace:
+    """Spans registrados durante um comando: [profundidade, nome, ms]."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.spans = []
+        self.depth = 0
+        self.task = asyncio.current_task()
+        self.start = time.perf_counter()
+
+    def report(self, total_ms: float) -> str:
+        # cada categoria soma só o tempo próprio dos seus spans (sem os filhos),
+        # para que esperas de rate limit dentro de uma chamada REST apareçam separadas
+        por_tipo = {}
+        for i, (depth, nome, ms) in enumerate(self.spans):
+            filhos = 0.0
+            for d, _, ms_filho in self.spans[i + 1:]:
+                if d <= depth:
+                    break
+                if d == depth + 1:
+                    filhos += ms_filho
+            tipo = nome.split(" ", 1)[0]
+            por_tipo[tipo] = por_tipo.get(tipo, 0.0) + max(ms - filhos, 0.0)
+        raiz = sum(ms for depth, _, ms in self.spans if depth == 0)
+        por_tipo["outros"] = max(total_ms - raiz, 0.0)
+
+        linhas = [f"🐢 Comando lento: {self.name} levou {total_ms:.0f} ms"]
+        linhas += [f"  {tipo}: {ms:.1f} ms" for tipo, ms in sorted(por_tipo.items(), key=lambda t: -t[1])]
+        linhas.append("  spans:")
+        linhas += [f"    {'  ' * depth}{nome} — {ms:.1f} ms" for depth, nome, ms in self.spans]
+        return "\n".join(linhas)
+
+
+def _in_trace_task(trace: Trace) -> bool:
+    # tasks criadas durante o comando herdam o contexto, mas não devem mexer na
+    # profundidade dos spans; threads de asyncio.to_thread são aguardadas pelo comando
+    try:
+        return asyncio.current_task() is trace.task
+    except RuntimeError:
+        return True
+
+
+@contextmanager
+def span(name: str, min_ms: float = 0.0):
+    """Mede o bloco dentro do trace atual; não faz nada fora de um comando rastreado."""
+    trace = _current.get()
+    if trace is None or not _in_trace_task(trace):
+        yield
+        return
+    idx = len(trace.spans)
+    trace.spans.append([trace.depth, name, 0.0])
+    trace.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.depth -= 1
+        ms = (time.perf_counter() - start) * 1000
+        if ms < min_ms and idx == len(trace.spans) - 1:
+            trace.spans.pop()
+        else:
+            trace.spans[idx][2] = ms
+
+
+def _record_span(name: str, ms: float):
+    """Registra um span já medido no nível atual do trace."""
+    trace = _current.get()
+    if trace is not None and _in_trace_task(trace):
+        trace.spans.append([trace.depth, name, ms])
+
+
+def traced(func):
+    """Envolve um comando ou autocomplete num trace; sem TRACE_COMMANDS devolve a função intacta."""
+    if not TRACE_ENABLED:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        trace = Trace(func.__name__)
+        token = _current.set(trace)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - trace.start) * 1000
+            if total_ms >= SLOW_MS:
+                print(trace.report(total_ms))
+
+    return wrapper
+
+
+def _wrap_sync(cls, attr: str, label):
+    original = getattr(cls, attr)
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        with span(label(self, *args)):
+            return original(self, *args, **kwargs)
+
+    setattr(cls, attr, wrapper)
+
+
+def _wrap_async(cls, attr: str, label, min_ms: float = 0.0):
+    original = getattr(cls, attr)
+
+    @functools.wraps(original)
+    async def wrapper(self, *args, **kwargs):
+        with span(label(self, *args), min_ms=min_ms):
+            return await original(self, *args, **kwargs)
+
+    setattr(cls, attr, wrapper)
+
+
+def _wrap_http_request(cls):
+    original = cls.request
+
+    @functools.wraps(original)
+    async def request(http, route, *args, **kwargs):
+        with span(f"discord {route.method} {route.path}"):
+            # o rate limit global é aguardado antes do bucket, fora do acquire
+            global_over = getattr(http, "_global_over", None)
+            if isinstance(global_over, asyncio.Event) and not global_over.is_set():
+                with span("ratelimit global"):
+                    await global_over.wait()
+            return await original(http, route, *args, **kwargs)
+
+    cls.request = request
+
+
+class _RateLimit429Filter(logging.Filter):
+    """Transforma o aviso de 429 do discord.http num span com o tempo de espera anunciado."""
+
+    RETRY_FMT = "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds."
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.msg == self.RETRY_FMT and record.args:
+            _record_span("ratelimit 429", float(record.args[-1]) * 1000)
+        return True
+
+
+def install():
+    """Instrumenta as chamadas ao Supabase e à API do Discord quando o tracing está ativo."""
+    global _installed
+    if not TRACE_ENABLED or _installed:
+        return
+    from postgrest import SyncQueryRequestBuilder, SyncSingleRequestBuilder
+    from discord.http import HTTPClient, Ratelimit
+    from discord.webhook.async_ import AsyncWebhookAdapter
+
+    def db_label(builder):
+        return f"db {builder.http_method} {builder.path}"
+
+    _wrap_sync(SyncQueryRequestBuilder, "execute", db_label)
+    _wrap_sync(SyncSingleRequestBuilder, "execute", db_label)
+    _wrap_http_request(HTTPClient)
+    _wrap_async(AsyncWebhookAdapter, "request", lambda adapter, route, *a: f"interaction {route.method} {route.path}")
+    # só registra quando houve espera de fato pelo rate limit
+    _wrap_async(Ratelimit, "acquire", lambda rl: "ratelimit bucket", min_ms=1.0)
+    # a espera após um 429 é um asyncio.sleep dentro de HTTPClient.request; o
+    # discord.http anuncia a duração no log logo antes de dormir
+    logging.getLogger("discord.http").addFilter(_RateLimit429Filter())
+    _installed = True
+
+
+async def capture_profile(seconds: int, tool: str = "cprofile") -> str:
+    """Perfila todo o event loop por `seconds` segundos e devolve o relatório em texto."""
+    global _profiling
+    if _profiling:
+        raise RuntimeError("Já existe uma captura de perfil em andamento.")
+    _profiling = True
+    try:
+        if tool == "pyinstrument":
+            from pyinstrument import Profiler  # dependência opcional
+            profiler = Profiler(async_mode="disabled")
+            profiler.start()
+            await asyncio.sleep(seconds)
+            profiler.stop()
+            return profiler.output_text(unicode=True)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        await asyncio.sleep(seconds)
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+        return out.getvalue()
+    finally:
+        _profiling = False